@@ -3,18 +3,19 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
 
-from workflow_engine import EventType, WorkflowEngine, parse_workflow
+from workflow_engine import EventType, WorkflowEngine, load_definition
 
 WORKFLOW_PATH = Path(__file__).parent / "example_workflow.json"
 
+# Fixed-width event type labels for the log dump, padded once up front.
+EVENT_LABELS = {event_type: event_type.value.ljust(25) for event_type in EventType}
+
 
 def main() -> None:
-    # 1. Load and validate the workflow definition
-    with open(WORKFLOW_PATH) as f:
-        definition = parse_workflow(json.load(f))
+    # 1. Load and validate the workflow definition (reuses a compiled artifact if fresh)
+    definition = load_definition(WORKFLOW_PATH)
     print(f"Loaded workflow: {definition.name} v{definition.version}")
     print(f"  Nodes: {', '.join(definition.nodes)}")
     print()
@@ -76,9 +77,8 @@ def main() -> None:
     print("=== Event Log (Scenario A) ===")
     for i, event in enumerate(run.events):
         print(
-            f"  [{i}] {event.event_type.value:25s} "
+            f"  [{i}] {EVENT_LABELS[event.event_type]} "
             f"node={event.node_id:20s} "
-            f"key={event.idempotency_key[:8]}... "
             f"payload={event.payload}"
         )
 
@@ -70,16 +70,16 @@ DECISION_WORKFLOW_JSON: dict = {
 }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def simple_workflow() -> WorkflowDefinition:
     return parse_workflow(SIMPLE_WORKFLOW_JSON)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def approval_workflow() -> WorkflowDefinition:
     return parse_workflow(APPROVAL_WORKFLOW_JSON)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def decision_workflow() -> WorkflowDefinition:
     return parse_workflow(DECISION_WORKFLOW_JSON)
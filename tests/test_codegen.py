@@ -0,0 +1,77 @@
+"""Tests for workflow_engine.codegen."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from workflow_engine import Condition, Transition
+from workflow_engine.codegen import compile_routers
+
+
+def _route(transitions: list[Transition], context: dict[str, Any]) -> str | None:
+    routers = compile_routers("test", {"a": tuple(transitions)})
+    return routers["a"](context)
+
+
+class TestCompileRouters:
+    @pytest.mark.parametrize(
+        ("operator", "value", "actual"),
+        [
+            ("eq", 1, 1),
+            ("eq", 1, 2),
+            ("neq", "x", "y"),
+            ("gt", 10, 11),
+            ("gte", 10, 10),
+            ("lt", 10, 10),
+            ("lte", 10, 9),
+            ("in", ["a", "b"], "a"),
+            ("not_in", ["a", "b"], "a"),
+            ("contains", "urgent", ["urgent"]),
+            ("contains", "urgent", []),
+        ],
+    )
+    def test_matches_condition_evaluate(self, operator: str, value: Any, actual: Any) -> None:
+        condition = Condition(field="f", operator=operator, value=value)
+        t = Transition(from_node="a", to_node="b", condition=condition)
+        expected = "b" if condition.evaluate({"f": actual}) else None
+        assert _route([t], {"f": actual}) == expected
+
+    def test_first_matching_transition_wins(self) -> None:
+        transitions = [
+            Transition("a", "big", Condition(field="n", operator="gt", value=100)),
+            Transition("a", "positive", Condition(field="n", operator="gt", value=0)),
+            Transition("a", "fallback"),
+        ]
+        assert _route(transitions, {"n": 500}) == "big"
+        assert _route(transitions, {"n": 5}) == "positive"
+        assert _route(transitions, {"n": -1}) == "fallback"
+
+    def test_shared_field_is_read_once_per_call(self) -> None:
+        class CountingDict(dict[str, Any]):
+            reads = 0
+
+            def get(self, key: str, default: Any = None) -> Any:
+                CountingDict.reads += 1
+                return super().get(key, default)
+
+        transitions = [
+            Transition("a", "high", Condition(field="n", operator="gt", value=100)),
+            Transition("a", "mid", Condition(field="n", operator="gt", value=10)),
+            Transition("a", "low", Condition(field="n", operator="gte", value=0)),
+        ]
+        assert _route(transitions, CountingDict(n=5)) == "low"
+        assert CountingDict.reads == 1
+
+    def test_definition_text_is_not_executed(self) -> None:
+        hostile = "x')\nraise SystemExit('injected')\n#"
+        t = Transition(hostile, hostile, Condition(field=hostile, operator="eq", value=hostile))
+        routers = compile_routers(hostile, {hostile: (t,)})
+        assert routers[hostile]({hostile: hostile}) == hostile
+        assert routers[hostile]({}) is None
+
+    def test_unknown_operator_defers_to_condition(self) -> None:
+        t = Transition("a", "b", Condition(field="x", operator="invalid", value=1))
+        with pytest.raises(ValueError, match="Unknown operator"):
+            _route([t], {"x": 1})
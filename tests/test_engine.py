@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+from dataclasses import replace
+
 import pytest
 
 from tests.conftest import DECISION_WORKFLOW_JSON
 from workflow_engine import (
+    ConditionEvaluationError,
     DuplicateEventError,
     EventType,
     InvalidEventError,
@@ -14,6 +17,7 @@ from workflow_engine import (
     WorkflowCompletedError,
     WorkflowDefinition,
     WorkflowEngine,
+    WorkflowRun,
     parse_workflow,
 )
 
@@ -38,6 +42,13 @@ class TestStart:
         run = engine.start(simple_workflow, context={"user": "alice"})
         assert run.context["user"] == "alice"
 
+    def test_events_are_stamped_by_engine_clock(self, simple_workflow: WorkflowDefinition) -> None:
+        ticks = iter(range(100, 200))
+        engine = WorkflowEngine(clock=lambda: next(ticks))
+        run = engine.start(simple_workflow)
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        assert [e.timestamp for e in run.events] == [100, 101]
+
     def test_start_with_explicit_run_id(
         self, engine: WorkflowEngine, simple_workflow: WorkflowDefinition
     ) -> None:
@@ -89,6 +100,26 @@ class TestSubmitEvent:
         engine.submit_event(run, EventType.TASK_COMPLETED, payload={"result": 42})
         assert run.context["result"] == 42
 
+    def test_start_event_snapshots_initial_context(
+        self, engine: WorkflowEngine, simple_workflow: WorkflowDefinition
+    ) -> None:
+        run = engine.start(simple_workflow, context={"user": "alice"})
+        engine.submit_event(run, EventType.TASK_COMPLETED, payload={"result": 42})
+        assert run.events[0].payload == {"context": {"user": "alice"}}
+
+    def test_context_at_reconstructs_intermediate_state(
+        self, engine: WorkflowEngine, approval_workflow: WorkflowDefinition
+    ) -> None:
+        run = engine.start(approval_workflow, context={"v": 1})
+        engine.submit_event(run, EventType.TASK_COMPLETED, payload={"v": 2, "a": True})
+        engine.submit_event(run, EventType.APPROVAL_SUBMITTED, payload={"v": 3})
+
+        assert dict(run.context_at(0)) == {"v": 1}
+        assert dict(run.context_at(1)) == {"v": 2, "a": True}
+        assert dict(run.context_at(-1)) == run.context
+        with pytest.raises(IndexError):
+            run.context_at(3)
+
     def test_event_on_completed_workflow_raises(
         self, engine: WorkflowEngine, simple_workflow: WorkflowDefinition
     ) -> None:
@@ -113,6 +144,31 @@ class TestSubmitEvent:
         with pytest.raises(DuplicateEventError, match="key-1"):
             engine.submit_event(run, EventType.APPROVAL_SUBMITTED, idempotency_key="key-1")
 
+    def test_key_filter_detects_duplicates(self, approval_workflow: WorkflowDefinition) -> None:
+        engine = WorkflowEngine(key_filter_capacity=100)
+        run = engine.start(approval_workflow)
+        engine.submit_event(run, EventType.TASK_COMPLETED, idempotency_key="key-1")
+        with pytest.raises(DuplicateEventError, match="key-1"):
+            engine.submit_event(run, EventType.APPROVAL_SUBMITTED, idempotency_key="key-1")
+
+        for validate in (False, True):
+            replayed = engine.replay(approval_workflow, run.events, validate=validate)
+            assert replayed.has_seen_key("key-1")
+            assert not replayed.has_seen_key("key-2")
+
+    def test_key_filter_capacity_must_be_positive(self) -> None:
+        with pytest.raises(ValueError, match="key_filter_capacity"):
+            WorkflowEngine(key_filter_capacity=0)
+
+    def test_events_without_key_are_not_deduplicated(
+        self, engine: WorkflowEngine, approval_workflow: WorkflowDefinition
+    ) -> None:
+        run = engine.start(approval_workflow)
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        engine.submit_event(run, EventType.APPROVAL_SUBMITTED)
+        assert [e.idempotency_key for e in run.events] == ["", "", ""]
+        assert run.status == RunStatus.COMPLETED
+
     def test_no_matching_transition_raises(self, engine: WorkflowEngine) -> None:
         # Decision node where no condition matches
         data = {
@@ -140,6 +196,13 @@ class TestSubmitEvent:
         with pytest.raises(TransitionError, match="No transition condition matched"):
             engine.submit_event(run, EventType.DECISION_MADE)
 
+    def test_condition_error_names_transition(self, engine: WorkflowEngine) -> None:
+        defn = parse_workflow(DECISION_WORKFLOW_JSON)
+        run = engine.start(defn, context={"amount": "not-a-number"})
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        with pytest.raises(ConditionEvaluationError, match="'decide' -> 'high_path'"):
+            engine.submit_event(run, EventType.DECISION_MADE)
+
 
 class TestReplay:
     def test_replay_simple_workflow(
@@ -164,6 +227,17 @@ class TestReplay:
         assert replayed.status == RunStatus.COMPLETED
         assert replayed.current_node_id == run.current_node_id
 
+    @pytest.mark.parametrize("method", ["replay", "replay_fast"])
+    def test_replay_accepts_a_one_shot_iterator(self, engine: WorkflowEngine, method: str) -> None:
+        defn = parse_workflow(DECISION_WORKFLOW_JSON)
+        run = engine.start(defn, context={"amount": 2000})
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        engine.submit_event(run, EventType.DECISION_MADE)
+
+        replayed = getattr(engine, method)(defn, (event for event in run.events))
+        assert replayed.current_node_id == run.current_node_id
+        assert replayed.events == run.events
+
     def test_replay_empty_log_raises(self, engine: WorkflowEngine) -> None:
         with pytest.raises(ValueError, match="empty event log"):
             engine.replay(
@@ -200,3 +274,165 @@ class TestReplay:
         assert r1.status == r2.status
         assert r1.current_node_id == r2.current_node_id
         assert r1.context == r2.context
+
+    def test_replay_validate_matches_payload_driven_run(self, engine: WorkflowEngine) -> None:
+        defn = parse_workflow(DECISION_WORKFLOW_JSON)
+        run = engine.start(defn, context={"amount": 500})
+        engine.submit_event(run, EventType.TASK_COMPLETED, payload={"amount": 5000})
+        engine.submit_event(run, EventType.DECISION_MADE, idempotency_key="decided")
+        assert run.current_node_id == "high_path"
+
+        replayed = engine.replay(defn, run.events, validate=True)
+        assert replayed.status == run.status
+        assert replayed.current_node_id == run.current_node_id
+        assert replayed.context == run.context
+        assert replayed.has_seen_key("decided")
+
+    def test_replay_validate_rejects_mismatched_event(
+        self, engine: WorkflowEngine, approval_workflow: WorkflowDefinition
+    ) -> None:
+        run = engine.start(approval_workflow)
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        tampered = [run.events[0], replace(run.events[1], event_type=EventType.DECISION_MADE)]
+
+        engine.replay(approval_workflow, tampered)  # trusted mode does not re-check
+        with pytest.raises(InvalidEventError, match="expects event"):
+            engine.replay(approval_workflow, tampered, validate=True)
+
+    def test_replay_validate_rejects_event_at_wrong_node(
+        self, engine: WorkflowEngine, approval_workflow: WorkflowDefinition
+    ) -> None:
+        run = engine.start(approval_workflow)
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        tampered = [run.events[0], replace(run.events[1], node_id="approve")]
+
+        with pytest.raises(InvalidEventError, match="'approve'"):
+            engine.replay(approval_workflow, tampered, validate=True)
+
+    def test_replay_validate_rejects_events_after_completion(
+        self, engine: WorkflowEngine, simple_workflow: WorkflowDefinition
+    ) -> None:
+        run = engine.start(simple_workflow)
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        log = [*run.events, run.events[-1]]
+
+        replayed = engine.replay(simple_workflow, log)
+        assert replayed.status == RunStatus.COMPLETED
+        with pytest.raises(WorkflowCompletedError):
+            engine.replay(simple_workflow, log, validate=True)
+
+    def test_replay_matches_live_run_through_cycles(self, engine: WorkflowEngine) -> None:
+        defn = parse_workflow(
+            {
+                "name": "retry_loop",
+                "version": "1.0.0",
+                "nodes": [
+                    {"id": "start", "type": "start"},
+                    {"id": "attempt", "type": "task"},
+                    {"id": "check", "type": "decision"},
+                    {"id": "end", "type": "end"},
+                ],
+                "transitions": [
+                    {"from_node": "start", "to_node": "attempt"},
+                    {"from_node": "attempt", "to_node": "check"},
+                    {
+                        "from_node": "check",
+                        "to_node": "attempt",
+                        "condition": {"field": "ok", "operator": "eq", "value": False},
+                    },
+                    {"from_node": "check", "to_node": "end"},
+                ],
+            }
+        )
+        run = engine.start(defn)
+        for ok in (False, False, True):
+            engine.submit_event(run, EventType.TASK_COMPLETED, payload={"ok": ok})
+            engine.submit_event(run, EventType.DECISION_MADE)
+        assert run.status == RunStatus.COMPLETED
+
+        replayed = engine.replay(defn, run.events)
+        assert replayed.status == run.status
+        assert replayed.current_node_id == run.current_node_id
+        assert replayed.context == run.context
+        assert len(replayed.events) == len(run.events)
+
+    def test_self_loop_waits_for_next_event(self, engine: WorkflowEngine) -> None:
+        defn = parse_workflow(
+            {
+                "name": "self_loop",
+                "version": "1.0.0",
+                "nodes": [
+                    {"id": "start", "type": "start"},
+                    {"id": "work", "type": "task"},
+                    {"id": "end", "type": "end"},
+                ],
+                "transitions": [
+                    {"from_node": "start", "to_node": "work"},
+                    {
+                        "from_node": "work",
+                        "to_node": "work",
+                        "condition": {"field": "more", "operator": "eq", "value": True},
+                    },
+                    {"from_node": "work", "to_node": "end"},
+                ],
+            }
+        )
+        run = engine.start(defn)
+        engine.submit_event(run, EventType.TASK_COMPLETED, payload={"more": True})
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        assert run.status == RunStatus.RUNNING
+        assert run.current_node_id == "work"
+        engine.submit_event(run, EventType.TASK_COMPLETED, payload={"more": False})
+        assert run.status == RunStatus.COMPLETED
+
+        for replayed in (engine.replay(defn, run.events), engine.replay_fast(defn, run.events)):
+            assert replayed.status == run.status
+            assert replayed.context == run.context
+
+
+class TestReplayFast:
+    @pytest.fixture
+    def completed_decision_run(self, engine: WorkflowEngine) -> WorkflowRun:
+        run = engine.start(parse_workflow(DECISION_WORKFLOW_JSON), context={"amount": 2000})
+        engine.submit_event(run, EventType.TASK_COMPLETED, payload={"note": "ok"})
+        engine.submit_event(run, EventType.DECISION_MADE)
+        engine.submit_event(run, EventType.TASK_COMPLETED, idempotency_key="final")
+        return run
+
+    @pytest.mark.parametrize("strict", [False, True])
+    def test_matches_replay(
+        self, engine: WorkflowEngine, completed_decision_run: WorkflowRun, strict: bool
+    ) -> None:
+        run = completed_decision_run
+        fast = engine.replay_fast(run.definition, run.events, strict=strict)
+        slow = engine.replay(run.definition, run.events)
+        assert fast.status == slow.status == RunStatus.COMPLETED
+        assert fast.current_node_id == slow.current_node_id
+        assert fast.context == slow.context
+        assert fast.has_seen_key(run.events[-1].idempotency_key)
+
+    def test_partial_log_resolves_last_transition(
+        self, engine: WorkflowEngine, completed_decision_run: WorkflowRun
+    ) -> None:
+        run = completed_decision_run
+        fast = engine.replay_fast(run.definition, run.events[:3])
+        assert fast.status == RunStatus.RUNNING
+        assert fast.current_node_id == "high_path"
+
+    def test_strict_rejects_unreachable_node(
+        self, engine: WorkflowEngine, completed_decision_run: WorkflowRun
+    ) -> None:
+        run = completed_decision_run
+        events = list(run.events)
+        events[3] = replace(events[3], node_id="collect")
+        engine.replay_fast(run.definition, events)  # trusted: follows the log
+        with pytest.raises(InvalidEventError, match="not reachable"):
+            engine.replay_fast(run.definition, events, strict=True)
+
+    def test_strict_rejects_events_after_completion(
+        self, engine: WorkflowEngine, simple_workflow: WorkflowDefinition
+    ) -> None:
+        run = engine.start(simple_workflow)
+        engine.submit_event(run, EventType.TASK_COMPLETED)
+        with pytest.raises(InvalidEventError, match="not reachable"):
+            engine.replay_fast(simple_workflow, [*run.events, run.events[-1]], strict=True)
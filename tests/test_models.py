@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
+import os
+import pickle
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
 import pytest
 
 from workflow_engine import (
     Condition,
     Event,
     EventType,
+    IdempotencyFilter,
     Node,
     NodeType,
     Transition,
@@ -15,6 +24,19 @@ from workflow_engine import (
     WorkflowRun,
 )
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class TestModels:
+    @pytest.mark.parametrize(
+        "model",
+        [Condition, Transition, Node, WorkflowDefinition, Event, WorkflowRun, IdempotencyFilter],
+    )
+    def test_models_use_slots(self, model: type) -> None:
+        assert "__slots__" in vars(model)
+        assert "__dict__" not in vars(model)
+
 
 class TestCondition:
     def test_eq(self) -> None:
@@ -60,6 +82,23 @@ class TestCondition:
         with pytest.raises(ValueError, match="Unknown operator"):
             c.evaluate({"x": 1})
 
+    def test_compiled_operator_does_not_affect_equality(self) -> None:
+        a = Condition(field="x", operator="gt", value=1)
+        b = Condition(field="x", operator="gt", value=1)
+        assert a == b
+        assert "_fn" not in repr(a)
+        assert sorted(Condition.OPERATORS) == [
+            "contains",
+            "eq",
+            "gt",
+            "gte",
+            "in",
+            "lt",
+            "lte",
+            "neq",
+            "not_in",
+        ]
+
     def test_missing_field_returns_none_comparison(self) -> None:
         c = Condition(field="missing", operator="eq", value=None)
         assert c.evaluate({}) is True
@@ -81,6 +120,67 @@ class TestTransition:
         assert t.can_fire({"approved": False}) is False
 
 
+class TestNode:
+    def test_expected_event_follows_node_type(self) -> None:
+        assert Node(id="t", type=NodeType.TASK).expected_event is EventType.TASK_COMPLETED
+        assert Node(id="d", type=NodeType.DECISION).expected_event is EventType.DECISION_MADE
+        assert Node(id="s", type=NodeType.START).expected_event is None
+
+    def test_pickles_constructor_arguments_only(self) -> None:
+        node = Node(id="t", type=NodeType.TASK, label="Task", config={"retries": 3})
+        assert node.__reduce__() == (Node, ("t", NodeType.TASK, "Task", {"retries": 3}))
+        restored = pickle.loads(pickle.dumps(node))
+        assert restored == node
+        assert restored.is_actionable is True
+
+    @pytest.mark.parametrize(
+        ("node_type", "is_end", "is_actionable"),
+        [
+            (NodeType.START, False, False),
+            (NodeType.TASK, False, True),
+            (NodeType.APPROVAL, False, True),
+            (NodeType.DECISION, False, True),
+            (NodeType.END, True, False),
+        ],
+    )
+    def test_flags_follow_node_type(
+        self, node_type: NodeType, is_end: bool, is_actionable: bool
+    ) -> None:
+        node = Node(id="n", type=node_type)
+        assert node.is_end is is_end
+        assert node.is_actionable is is_actionable
+
+
+class TestWorkflowDefinition:
+    def test_outgoing_index_preserves_definition_order(self) -> None:
+        t_high = Transition(
+            from_node="d", to_node="hi", condition=Condition(field="x", operator="gt", value=1)
+        )
+        t_low = Transition(from_node="d", to_node="lo")
+        defn = WorkflowDefinition(
+            name="test",
+            version="1.0.0",
+            nodes={
+                "s": Node(id="s", type=NodeType.START),
+                "d": Node(id="d", type=NodeType.DECISION),
+                "hi": Node(id="hi", type=NodeType.END),
+                "lo": Node(id="lo", type=NodeType.END),
+            },
+            transitions=[Transition(from_node="s", to_node="d"), t_high, t_low],
+        )
+        assert defn.outgoing["d"] == (t_high, t_low)
+        assert "hi" not in defn.outgoing
+        assert dict(defn._trivial_next) == {"s": "d"}
+        assert defn.start_node is defn.nodes["s"]
+        assert defn.end_nodes == (defn.nodes["hi"], defn.nodes["lo"])
+
+
+class TestEvent:
+    def test_recorded_at_converts_epoch_nanoseconds(self) -> None:
+        event = Event(event_type=EventType.TASK_COMPLETED, timestamp=1_700_000_000_123_456_789)
+        assert event.recorded_at == datetime(2023, 11, 14, 22, 13, 20, 123456, tzinfo=timezone.utc)
+
+
 class TestWorkflowRun:
     def test_idempotency_key_tracking(self) -> None:
         defn = WorkflowDefinition(
@@ -92,10 +192,84 @@ class TestWorkflowRun:
         run = WorkflowRun(run_id="r1", definition=defn, context={}, current_node_id="s")
         event = Event(
             event_type=EventType.WORKFLOW_STARTED,
-            timestamp=__import__("datetime").datetime.now(__import__("datetime").timezone.utc),
+            timestamp=time.time_ns(),
             idempotency_key="key-1",
         )
         assert run.has_seen_key("key-1") is False
         run.record_event(event)
         assert run.has_seen_key("key-1") is True
         assert run.has_seen_key("key-2") is False
+
+    def test_key_filter_hits_are_confirmed_against_the_log(self) -> None:
+        defn = WorkflowDefinition(
+            name="test",
+            version="1.0.0",
+            nodes={"s": Node(id="s", type=NodeType.START), "e": Node(id="e", type=NodeType.END)},
+            transitions=[Transition(from_node="s", to_node="e")],
+        )
+        # Overfill a tiny filter so that every lookup is a (false) hit.
+        key_filter = IdempotencyFilter(capacity=1)
+        key_filter.update(f"filler-{i}" for i in range(100))
+        run = WorkflowRun(
+            run_id="r1", definition=defn, context={}, current_node_id="s", _seen_keys=key_filter
+        )
+        assert "key-1" in key_filter
+        assert run.has_seen_key("key-1") is False
+        run.record_event(
+            Event(event_type=EventType.WORKFLOW_STARTED, timestamp=0, idempotency_key="key-1")
+        )
+        assert run.has_seen_key("key-1") is True
+
+    def test_run_is_slotted(self) -> None:
+        defn = WorkflowDefinition(
+            name="test",
+            version="1.0.0",
+            nodes={"s": Node(id="s", type=NodeType.START), "e": Node(id="e", type=NodeType.END)},
+            transitions=[Transition(from_node="s", to_node="e")],
+        )
+        run = WorkflowRun(run_id="r1", definition=defn, context={}, current_node_id="s")
+        assert not hasattr(run, "__dict__")
+        with pytest.raises(AttributeError):
+            run.unknown_attribute = 1  # type: ignore[attr-defined]
+
+
+class TestIdempotencyFilter:
+    def test_pickled_filter_is_valid_under_another_hash_seed(self, tmp_path: Path) -> None:
+        path = tmp_path / "filter.pickle"
+        write = (
+            "import pickle, sys; from workflow_engine import IdempotencyFilter; "
+            "f = IdempotencyFilter(capacity=100); f.add('key-1'); "
+            "open(sys.argv[1], 'wb').write(pickle.dumps(f))"
+        )
+        subprocess.run(
+            [sys.executable, "-c", write, str(path)],
+            check=True,
+            env={**os.environ, "PYTHONHASHSEED": "1"},
+        )
+        read = (
+            "import pickle, sys; "
+            "sys.exit('key-1' not in pickle.loads(open(sys.argv[1], 'rb').read()))"
+        )
+        subprocess.run(
+            [sys.executable, "-c", read, str(path)],
+            check=True,
+            env={**os.environ, "PYTHONHASHSEED": "2"},
+        )
+        assert "key-1" in pickle.loads(path.read_bytes())
+
+    def test_has_no_false_negatives(self) -> None:
+        key_filter = IdempotencyFilter(capacity=1000)
+        keys = [f"key-{i}" for i in range(1000)]
+        key_filter.update(keys)
+        assert all(key in key_filter for key in keys)
+
+    def test_false_positive_rate_is_near_target(self) -> None:
+        key_filter = IdempotencyFilter(capacity=1000, error_rate=0.01)
+        key_filter.update(f"key-{i}" for i in range(1000))
+        false_hits = sum(f"other-{i}" in key_filter for i in range(10_000))
+        assert false_hits < 300
+
+    @pytest.mark.parametrize(("capacity", "error_rate"), [(0, 0.01), (10, 0.0), (10, 1.0)])
+    def test_rejects_invalid_sizing(self, capacity: int, error_rate: float) -> None:
+        with pytest.raises(ValueError):
+            IdempotencyFilter(capacity=capacity, error_rate=error_rate)
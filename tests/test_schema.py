@@ -3,6 +3,12 @@
 from __future__ import annotations
 
 import copy
+import json
+import os
+import pickle
+import subprocess
+import sys
+from typing import TYPE_CHECKING, Any
 
 import pytest
 
@@ -10,9 +16,14 @@ from tests.conftest import DECISION_WORKFLOW_JSON, SIMPLE_WORKFLOW_JSON
 from workflow_engine import (
     WorkflowDefinitionError,
     WorkflowValidationError,
+    load_definition,
     parse_workflow,
     validate_schema,
 )
+from workflow_engine.schema import _get_fast_validator
+
+if TYPE_CHECKING:
+    from pathlib import Path
 
 
 class TestValidateSchema:
@@ -46,6 +57,38 @@ class TestValidateSchema:
         with pytest.raises(WorkflowValidationError):
             validate_schema(data)
 
+    @pytest.mark.parametrize("key", ["nodes", "transitions"])
+    def test_tuple_arrays_fail_with_or_without_fast_validator(self, key: str) -> None:
+        data = {**SIMPLE_WORKFLOW_JSON, key: tuple(SIMPLE_WORKFLOW_JSON[key])}
+        fast_validate = _get_fast_validator()
+        if fast_validate is not None:
+            fast_validate(data)  # fastjsonschema treats tuples as arrays
+        with pytest.raises(WorkflowValidationError, match=key):
+            validate_schema(data)
+
+    @pytest.mark.parametrize("data", [[1, 2], None, "workflow"])
+    def test_non_object_fails_with_or_without_fast_validator(self, data: Any) -> None:
+        with pytest.raises(WorkflowValidationError):
+            validate_schema(data)
+        with pytest.raises(WorkflowValidationError):
+            parse_workflow(data)
+
+    def test_fast_validator_agrees_with_jsonschema(self) -> None:
+        pytest.importorskip("fastjsonschema")
+        fast_validate = _get_fast_validator()
+        assert fast_validate is not None
+        fast_validate(DECISION_WORKFLOW_JSON)  # should not raise
+        data = copy.deepcopy(DECISION_WORKFLOW_JSON)
+        data["transitions"][2]["condition"]["operator"] = "bad_op"
+        with pytest.raises(ValueError):
+            fast_validate(data)
+        with pytest.raises(WorkflowValidationError, match="bad_op"):
+            validate_schema(data)
+
+    def test_importing_package_does_not_import_jsonschema(self) -> None:
+        code = "import sys, workflow_engine; sys.exit('jsonschema' in sys.modules)"
+        subprocess.run([sys.executable, "-c", code], check=True)
+
 
 class TestParseWorkflow:
     def test_parse_simple_workflow(self) -> None:
@@ -130,3 +173,156 @@ class TestParseWorkflow:
         }
         with pytest.raises(WorkflowDefinitionError, match="exactly one start"):
             parse_workflow(data)
+
+    def test_identical_definitions_share_parsed_instance(self) -> None:
+        first = parse_workflow(SIMPLE_WORKFLOW_JSON)
+        second = parse_workflow(copy.deepcopy(SIMPLE_WORKFLOW_JSON))
+        assert first is second
+
+    def test_cached_definition_does_not_alias_input(self) -> None:
+        data = copy.deepcopy(SIMPLE_WORKFLOW_JSON)
+        data["nodes"][1]["config"] = {"retries": 3}
+        defn = parse_workflow(data)
+        data["nodes"][1]["config"]["retries"] = 99
+        assert defn.nodes["do_task"].config == {"retries": 3}
+
+    def test_parsed_definition_is_immutable(self) -> None:
+        defn = parse_workflow(SIMPLE_WORKFLOW_JSON)
+        assert isinstance(defn.transitions, tuple)
+        with pytest.raises(TypeError):
+            defn.nodes["extra"] = defn.nodes["end"]  # type: ignore[index]
+
+    def test_input_that_changes_in_json_round_trip_is_parsed_as_given(self) -> None:
+        data = copy.deepcopy(SIMPLE_WORKFLOW_JSON)
+        data["nodes"][1]["config"] = {1: "a"}
+        defn = parse_workflow(data)
+        assert defn.nodes["do_task"].config == {1: "a"}
+        assert parse_workflow(copy.deepcopy(data)) is not defn
+
+        tupled = {**SIMPLE_WORKFLOW_JSON, "nodes": tuple(SIMPLE_WORKFLOW_JSON["nodes"])}
+        with pytest.raises(WorkflowValidationError, match="nodes"):
+            parse_workflow(tupled)
+
+    def test_nested_definition_data_is_read_only(self) -> None:
+        data = copy.deepcopy(DECISION_WORKFLOW_JSON)
+        data["nodes"][1]["config"] = {"retries": 3, "tags": ["a"]}
+        data["transitions"][2]["condition"] = {
+            "field": "tier",
+            "operator": "in",
+            "value": ["gold", "platinum"],
+        }
+        defn = parse_workflow(data)
+        config = defn.nodes[data["nodes"][1]["id"]].config
+        condition = defn.transitions[2].condition
+        assert condition is not None
+        with pytest.raises(TypeError):
+            config["retries"] = 99
+        with pytest.raises(TypeError):
+            config["tags"].append("b")
+        with pytest.raises(TypeError):
+            condition.value.append("silver")
+        again = parse_workflow(copy.deepcopy(data))
+        assert again is defn
+        assert again.nodes[data["nodes"][1]["id"]].config == {"retries": 3, "tags": ["a"]}
+        assert json.loads(json.dumps(config)) == {"retries": 3, "tags": ["a"]}
+
+    def test_node_ids_are_interned(self) -> None:
+        defn = parse_workflow(SIMPLE_WORKFLOW_JSON)
+        first = defn.transitions[0]
+        assert first.from_node is defn.nodes["start"].id
+        assert first.to_node is defn.nodes["do_task"].id
+
+
+class TestLoadDefinition:
+    @pytest.fixture
+    def workflow_file(self, tmp_path: Path) -> Path:
+        path = tmp_path / "workflow.json"
+        path.write_text(json.dumps(DECISION_WORKFLOW_JSON))
+        return path
+
+    def test_writes_and_reuses_compiled_artifact(self, workflow_file: Path) -> None:
+        first = load_definition(workflow_file)
+        compiled = workflow_file.with_name("workflow.json.compiled")
+        assert compiled.exists()
+        stat = workflow_file.stat()
+        os.utime(compiled, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        second = load_definition(workflow_file)
+        assert second is not first  # unpickled, not re-parsed through the cache
+        assert second == first
+        assert second._targets == first._targets
+
+    def test_stale_artifact_is_ignored(self, workflow_file: Path) -> None:
+        load_definition(workflow_file)
+        data = copy.deepcopy(DECISION_WORKFLOW_JSON)
+        data["name"] = "renamed"
+        workflow_file.write_text(json.dumps(data))
+        compiled = workflow_file.with_name("workflow.json.compiled")
+        stat = workflow_file.stat()
+        os.utime(compiled, ns=(stat.st_atime_ns, stat.st_mtime_ns - 1))
+
+        assert load_definition(workflow_file).name == "renamed"
+
+    def test_corrupt_artifact_falls_back_to_parse(self, workflow_file: Path) -> None:
+        compiled = workflow_file.with_name("workflow.json.compiled")
+        compiled.write_bytes(b"not a pickle")
+        stat = workflow_file.stat()
+        os.utime(compiled, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        assert load_definition(workflow_file).name == "decision_flow"
+
+    def test_decodes_like_the_standard_library(self, tmp_path: Path) -> None:
+        data = copy.deepcopy(DECISION_WORKFLOW_JSON)
+        data["nodes"][1]["config"] = {"threshold": float("nan")}
+        data["transitions"][2]["condition"]["value"] = 2**70
+        path = tmp_path / "big.json"
+        path.write_text(json.dumps(data))
+
+        defn = load_definition(path)
+        condition = defn.transitions[2].condition
+        assert condition is not None
+        assert condition.value == 2**70
+        assert type(condition.value) is int
+        threshold = defn.nodes[data["nodes"][1]["id"]].config["threshold"]
+        assert threshold != threshold  # NaN
+
+    def test_artifact_in_another_format_is_reparsed(self, workflow_file: Path) -> None:
+        # Earlier releases pickled the bare definition, without a format tag.
+        other = parse_workflow({**DECISION_WORKFLOW_JSON, "name": "old_artifact"})
+        compiled = workflow_file.with_name("workflow.json.compiled")
+        compiled.write_bytes(pickle.dumps(other))
+        stat = workflow_file.stat()
+        os.utime(compiled, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        assert load_definition(workflow_file).name == "decision_flow"
+
+
+class TestSharedTransitions:
+    def test_identical_edges_are_shared_across_definitions(self) -> None:
+        renamed = {**DECISION_WORKFLOW_JSON, "name": "decision_flow_copy"}
+        a = parse_workflow(DECISION_WORKFLOW_JSON)
+        b = parse_workflow(renamed)
+        assert a is not b
+        assert all(x is y for x, y in zip(a.transitions, b.transitions, strict=True))
+
+    def test_condition_values_of_different_types_are_not_merged(self) -> None:
+        data = copy.deepcopy(DECISION_WORKFLOW_JSON)
+        data["transitions"][2]["condition"] = {"field": "flag", "operator": "eq", "value": 1}
+        other = copy.deepcopy(data)
+        other["transitions"][2]["condition"]["value"] = True
+        int_cond = parse_workflow(data).transitions[2].condition
+        bool_cond = parse_workflow(other).transitions[2].condition
+        assert int_cond is not None and bool_cond is not None
+        assert type(int_cond.value) is int
+        assert bool_cond.value is True
+
+    def test_unhashable_condition_values_are_supported(self) -> None:
+        data = copy.deepcopy(DECISION_WORKFLOW_JSON)
+        data["transitions"][2]["condition"] = {
+            "field": "tier",
+            "operator": "in",
+            "value": ["gold", "platinum"],
+        }
+        condition = parse_workflow(data).transitions[2].condition
+        assert condition is not None
+        assert condition.evaluate({"tier": "gold"}) is True
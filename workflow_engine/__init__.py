@@ -16,6 +16,7 @@ from workflow_engine.models import (
     Condition,
     Event,
     EventType,
+    IdempotencyFilter,
     Node,
     NodeType,
     RunStatus,
@@ -23,7 +24,7 @@ from workflow_engine.models import (
     WorkflowDefinition,
     WorkflowRun,
 )
-from workflow_engine.schema import parse_workflow, validate_schema
+from workflow_engine.schema import load_definition, parse_workflow, validate_schema
 
 __version__ = "0.1.0"
 
@@ -34,6 +35,7 @@ __all__ = [
     "Condition",
     "Event",
     "EventType",
+    "IdempotencyFilter",
     "Node",
     "NodeType",
     "RunStatus",
@@ -41,6 +43,7 @@ __all__ = [
     "WorkflowDefinition",
     "WorkflowRun",
     # Schema
+    "load_definition",
     "parse_workflow",
     "validate_schema",
     # Exceptions
@@ -0,0 +1,84 @@
+"""Compile per-node routing functions from workflow transitions."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+    from workflow_engine.models import Transition
+
+# Python expression templates for each operator; ``{a}`` is the context value
+# and ``{v}`` the condition value. Must agree with ``models._OPERATORS``.
+_OPERATOR_TEMPLATES: dict[str, str] = {
+    "eq": "{a} == {v}",
+    "neq": "{a} != {v}",
+    "gt": "{a} > {v}",
+    "gte": "{a} >= {v}",
+    "lt": "{a} < {v}",
+    "lte": "{a} <= {v}",
+    "in": "{a} in {v}",
+    "not_in": "{a} not in {v}",
+    "contains": "{v} in {a}",
+}
+
+
+def compile_routers(
+    name: str, outgoing: Mapping[str, tuple[Transition, ...]]
+) -> dict[str, Callable[[dict[str, Any]], str | None]]:
+    """Generate one routing function per source node.
+
+    Each function takes the run context and returns the target of the first
+    transition whose condition holds, or ``None`` if none does. Conditions are
+    inlined as plain comparisons, so routing does no operator dispatch or
+    attribute lookups at run time. Each context field is fetched at most once
+    per call: the first condition that reads a field binds it to a local that
+    later sibling conditions reuse.
+
+    Only generated identifiers appear in the source; node ids, field names and
+    condition values are bound as constants in the function's namespace, so
+    definition contents are never interpreted as code. Exceptions raised by a
+    comparison propagate unchanged to the caller.
+    """
+    namespace: dict[str, Any] = {}
+    lines: list[str] = []
+    function_names: dict[str, str] = {}
+
+    for i, (node_id, transitions) in enumerate(outgoing.items()):
+        fn_name = f"route_{i}"
+        function_names[node_id] = fn_name
+        lines.append(f"def {fn_name}(ctx):")
+        field_locals: dict[str, str] = {}
+        for j, t in enumerate(transitions):
+            target = f"n_{i}_{j}"
+            namespace[target] = t.to_node
+            cond = t.condition
+            if cond is None:
+                lines.append(f"    return {target}")
+                break
+            template = _OPERATOR_TEMPLATES.get(cond.operator)
+            if template is None:
+                # Unknown operator: defer to Condition.evaluate, which raises.
+                predicate = f"p_{i}_{j}"
+                namespace[predicate] = cond.evaluate
+                test = f"{predicate}(ctx)"
+            else:
+                actual = field_locals.get(cond.field)
+                if actual is None:
+                    # First read of this field in the chain: fetch it once.
+                    k = len(field_locals)
+                    actual = field_locals[cond.field] = f"a_{k}"
+                    namespace[f"f_{i}_{k}"] = cond.field
+                    lines.append(f"    {actual} = ctx.get(f_{i}_{k})")
+                value = f"v_{i}_{j}"
+                namespace[value] = cond.value
+                test = template.format(a=actual, v=value)
+            lines.append(f"    if {test}:")
+            lines.append(f"        return {target}")
+        else:
+            lines.append("    return None")
+
+    code = compile("\n".join(lines), f"<workflow {name}>", "exec")
+    exec(code, namespace)
+    return {node_id: namespace[fn_name] for node_id, fn_name in function_names.items()}
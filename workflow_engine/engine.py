@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
+import time
 import uuid
-from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from workflow_engine.exceptions import (
     ConditionEvaluationError,
@@ -14,16 +14,17 @@ from workflow_engine.exceptions import (
     WorkflowCompletedError,
 )
 from workflow_engine.models import (
-    NODE_EVENT_MAP,
     Event,
     EventType,
-    Node,
-    NodeType,
+    IdempotencyFilter,
     RunStatus,
     WorkflowDefinition,
     WorkflowRun,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
 
 class WorkflowEngine:
     """Executes workflows defined by a WorkflowDefinition.
@@ -34,8 +35,29 @@ class WorkflowEngine:
         run = engine.start(definition, context={"amount": 500})
         run = engine.submit_event(run, EventType.TASK_COMPLETED, payload={...})
         run = engine.replay(definition, run.events)
+
+    Event timestamps come from ``clock``, a zero-argument callable returning
+    integer nanoseconds since the Unix epoch (``time.time_ns`` by default).
+    Supplying a cheaper or fixed clock is useful in benchmarks and tests.
+    Replay never reads the clock; replayed events keep their recorded times.
+
+    Runs track used idempotency keys in a set. For very long runs, pass
+    ``key_filter_capacity`` (the expected number of keyed events per run) to
+    track them in an :class:`~workflow_engine.models.IdempotencyFilter`
+    instead, trading a small fixed-size bit array for a log scan whenever
+    the filter reports a possible duplicate.
     """
 
+    def __init__(
+        self,
+        clock: Callable[[], int] = time.time_ns,
+        key_filter_capacity: int | None = None,
+    ) -> None:
+        if key_filter_capacity is not None and key_filter_capacity <= 0:
+            raise ValueError("key_filter_capacity must be positive")
+        self._clock = clock
+        self._key_filter_capacity = key_filter_capacity
+
     def start(
         self,
         definition: WorkflowDefinition,
@@ -64,12 +86,14 @@ class WorkflowEngine:
             definition=definition,
             context=ctx,
             current_node_id=definition.start_node.id,
+            _seen_keys=self._new_seen_keys(),
         )
 
         start_event = Event(
             event_type=EventType.WORKFLOW_STARTED,
-            timestamp=datetime.now(timezone.utc),
-            payload={"context": ctx},
+            timestamp=self._clock(),
+            # Snapshot: run.context is updated in place as events arrive.
+            payload={"context": dict(ctx)},
             node_id=definition.start_node.id,
         )
         run.record_event(start_event)
@@ -90,8 +114,11 @@ class WorkflowEngine:
         Args:
             run: The current workflow run.
             event_type: The type of event being submitted.
-            payload: Optional data associated with the event.
-            idempotency_key: Optional key for deduplication.
+            payload: Optional data associated with the event. The dict is
+                stored on the event as-is (not copied), so callers must not
+                mutate it after submitting.
+            idempotency_key: Optional key for deduplication. Events submitted
+                without one are recorded with an empty key and never deduplicated.
 
         Returns:
             The updated WorkflowRun (same object, mutated in place).
@@ -106,26 +133,15 @@ class WorkflowEngine:
                 f"Cannot submit events to a {run.status.value} workflow run."
             )
 
-        if idempotency_key and run.has_seen_key(idempotency_key):
-            raise DuplicateEventError(
-                f"Event with idempotency key '{idempotency_key}' has already been processed."
-            )
-
-        current_node = run.definition.nodes[run.current_node_id]
-        expected = NODE_EVENT_MAP.get(current_node.type)
-        if expected is None or event_type != expected:
-            raise InvalidEventError(
-                f"Node '{current_node.id}' (type={current_node.type.value}) "
-                f"expects event '{expected.value if expected else 'N/A'}', "
-                f"got '{event_type.value}'."
-            )
+        self._check_event(run, event_type, idempotency_key)
 
+        node_id = run.current_node_id
         event = Event(
             event_type=event_type,
-            timestamp=datetime.now(timezone.utc),
-            payload=dict(payload) if payload else {},
-            idempotency_key=idempotency_key or uuid.uuid4().hex,
-            node_id=current_node.id,
+            timestamp=self._clock(),
+            payload=payload or {},
+            idempotency_key=idempotency_key or "",
+            node_id=node_id,
         )
         run.record_event(event)
 
@@ -139,26 +155,156 @@ class WorkflowEngine:
     def replay(
         self,
         definition: WorkflowDefinition,
-        events: list[Event],
+        events: Iterable[Event],
         run_id: str | None = None,
+        validate: bool = False,
     ) -> WorkflowRun:
         """Deterministically replay a workflow from its event log.
 
         Given the same definition and events, this always produces the
         same final state.
 
+        By default the log is trusted: it was produced by ``submit_event``,
+        which already enforced the per-event checks, so replay only applies
+        transitions and context updates and rebuilds the idempotency key set
+        in one pass at the end. Pass ``validate=True`` to re-check every event
+        as ``submit_event`` would, e.g. for logs from an untrusted source.
+
         Args:
             definition: The workflow definition.
-            events: The ordered event log to replay.
-            run_id: Optional run ID (defaults to the first event's idempotency key).
+            events: The ordered event log to replay. Any iterable works and is
+                consumed once, so a log can be streamed from storage.
+            run_id: Optional run ID (generated if not provided).
+            validate: Re-apply ``submit_event``'s checks to each replayed event.
 
         Returns:
             A WorkflowRun in the replayed state.
+
+        Raises:
+            WorkflowCompletedError: If ``validate`` is set and the log continues
+                past the end of the workflow.
+            DuplicateEventError: If ``validate`` is set and an idempotency key repeats.
+            InvalidEventError: If ``validate`` is set and an event does not match
+                the node it is replayed at.
         """
-        if not events:
-            raise ValueError("Cannot replay an empty event log.")
+        it = iter(events)
+        run = self._start_replay(definition, it, run_id)
+
+        if not validate:
+            self._replay_trusted(run, it)
+            run._seen_keys.update(e.idempotency_key for e in run.events if e.idempotency_key)
+            return run
+
+        check_event = self._check_event
+        advance = self._advance
+        append = run.events.append
+        add_key = run._seen_keys.add
+        update = run.context.update
+        for event in it:
+            if run.status != RunStatus.RUNNING:
+                raise WorkflowCompletedError(
+                    f"Event log continues after the workflow run {run.status.value}."
+                )
+            if event.node_id != run.current_node_id:
+                raise InvalidEventError(
+                    f"Event recorded at node '{event.node_id}', but the run is at "
+                    f"node '{run.current_node_id}'."
+                )
+            key = event.idempotency_key
+            check_event(run, event.event_type, key)
+            # Inlined WorkflowRun.record_event.
+            append(event)
+            if key:
+                add_key(key)
+            if event.payload:
+                update(event.payload)
+            advance(run)
+
+        return run
+
+    def replay_fast(
+        self,
+        definition: WorkflowDefinition,
+        events: Iterable[Event],
+        run_id: str | None = None,
+        strict: bool = False,
+    ) -> WorkflowRun:
+        """Replay an event log by following its recorded node ids.
+
+        Every event records the node it was submitted at, so the outcome of
+        each transition is already implied by the next event's ``node_id``.
+        Instead of re-evaluating transition conditions, the run jumps straight
+        to that node; only the last event's transition is resolved normally.
+        The result matches :meth:`replay` for any log produced by this engine
+        against the same definition.
 
-        first = events[0]
+        With ``strict=True`` each hop is checked against the definition: the
+        target must be an outgoing transition of the previous node, events must
+        match their node's type and idempotency keys must be unique. Conditions
+        are still not re-evaluated; use ``replay(..., validate=True)`` for that.
+
+        Args:
+            definition: The workflow definition.
+            events: The ordered event log to replay. Any iterable works and is
+                consumed once, so a log can be streamed from storage.
+            run_id: Optional run ID (generated if not provided).
+            strict: Check each recorded hop against the definition.
+
+        Returns:
+            A WorkflowRun in the replayed state.
+
+        Raises:
+            DuplicateEventError: If ``strict`` is set and an idempotency key repeats.
+            InvalidEventError: If ``strict`` is set and an event was recorded at a
+                node the run cannot reach (including past an end node), or does
+                not match its node's type.
+        """
+        it = iter(events)
+        run = self._start_replay(definition, it, run_id)
+        targets = definition._targets
+        update = run.context.update
+
+        previous: Event | None = None
+        for event in it:
+            node_id = event.node_id
+            if strict:
+                if previous is None:
+                    reachable = node_id == run.current_node_id
+                else:
+                    reachable = node_id in targets.get(previous.node_id, ())
+                if not reachable:
+                    raise InvalidEventError(
+                        f"Event recorded at node '{node_id}', which is not reachable "
+                        f"from node '{run.current_node_id}'."
+                    )
+            run.current_node_id = node_id
+            if strict:
+                self._check_event(run, event.event_type, event.idempotency_key)
+                run.record_event(event)
+            else:
+                run.events.append(event)
+            if event.payload:
+                update(event.payload)
+            previous = event
+
+        if previous is not None:
+            # Nothing after the last event records where it led; resolve it.
+            self._advance(run)
+
+        if not strict:
+            run._seen_keys.update(e.idempotency_key for e in run.events if e.idempotency_key)
+        return run
+
+    def _start_replay(
+        self, definition: WorkflowDefinition, events: Iterator[Event], run_id: str | None
+    ) -> WorkflowRun:
+        """Create a run from the log's WORKFLOW_STARTED event and advance past start.
+
+        Consumes only the first event of ``events``.
+        """
+        first = next(events, None)
+        if first is None:
+            raise ValueError("Cannot replay an empty event log.")
         if first.event_type != EventType.WORKFLOW_STARTED:
             raise ValueError("Event log must start with a WORKFLOW_STARTED event.")
 
@@ -170,68 +316,141 @@ class WorkflowEngine:
             definition=definition,
             context=ctx,
             current_node_id=definition.start_node.id,
+            _seen_keys=self._new_seen_keys(),
         )
         run.record_event(first)
         self._advance(run)
+        return run
+
+    def _replay_trusted(self, run: WorkflowRun, events: Iterable[Event]) -> None:
+        """Apply already-validated events to ``run``, one transition per event.
 
-        for event in events[1:]:
+        Equivalent to recording each event and calling :meth:`_advance`, but
+        specialised for replay: a running workflow always rests on an
+        actionable node, so an event recorded at that node moves the run
+        exactly one transition. Idempotency keys are not tracked here.
+        """
+        nodes = run.definition.nodes
+        append = run.events.append
+        update = run.context.update
+        for event in events:
             if run.status != RunStatus.RUNNING:
                 break
-            run.record_event(event)
+            append(event)
             if event.payload:
-                run.context.update(event.payload)
-            self._advance(run)
+                update(event.payload)
 
-        return run
+            node_id = run.current_node_id
+            if event.node_id != node_id or event.event_type != nodes[node_id].expected_event:
+                continue  # not this node's event; _advance would keep waiting
+
+            next_node_id = self._resolve_transition(run, node_id)
+            run.current_node_id = next_node_id
+            if nodes[next_node_id].is_end:
+                run.status = RunStatus.COMPLETED
+
+    def _new_seen_keys(self) -> set[str] | IdempotencyFilter:
+        """Return an empty idempotency key tracker for a new run."""
+        if self._key_filter_capacity is None:
+            return set()
+        return IdempotencyFilter(self._key_filter_capacity)
+
+    def _check_event(
+        self, run: WorkflowRun, event_type: EventType, idempotency_key: str | None
+    ) -> None:
+        """Check that an event may be applied at the run's current node."""
+        if idempotency_key and run.has_seen_key(idempotency_key):
+            raise DuplicateEventError(
+                f"Event with idempotency key '{idempotency_key}' has already been processed."
+            )
+
+        node_id = run.current_node_id
+        node = run.definition.nodes[node_id]
+        expected = node.expected_event
+        if expected is None or event_type != expected:
+            raise InvalidEventError(
+                f"Node '{node_id}' (type={node.type.value}) "
+                f"expects event '{expected.value if expected else 'N/A'}', "
+                f"got '{event_type.value}'."
+            )
 
     def _advance(self, run: WorkflowRun) -> None:
         """Advance the run through transitions until an actionable node is reached.
 
         An actionable node is one that requires an external event (task, approval,
-        decision) or an end node.
+        decision) or an end node. The run only leaves the node it currently rests
+        on if the last recorded event was submitted there; every node reached
+        after that is a fresh arrival and waits for its own event.
         """
-        max_steps = len(run.definition.nodes) + 1  # guard against infinite loops
-        for _ in range(max_steps):
-            current_node = run.definition.nodes[run.current_node_id]
+        nodes = run.definition.nodes
+        node_id = run.current_node_id
+        node = nodes[node_id]
+        if node.is_end:
+            run.status = RunStatus.COMPLETED
+            return
+
+        if node.is_actionable:
+            # Only leave an actionable node if the last event was submitted here.
+            events = run.events
+            if not events:
+                return
+            last_event = events[-1]
+            if last_event.event_type != node.expected_event or last_event.node_id != node_id:
+                return
 
-            if current_node.type == NodeType.END:
+        max_steps = len(nodes) + 1  # guard against infinite loops
+        steps = 0
+        while steps < max_steps:
+            steps += 1
+            node_id = self._resolve_transition(run, node_id)
+            run.current_node_id = node_id
+            node = nodes[node_id]
+            if node.is_end:
                 run.status = RunStatus.COMPLETED
                 return
-
-            if current_node.type in (NodeType.TASK, NodeType.APPROVAL, NodeType.DECISION):
-                # These need an external event to proceed — only auto-advance
-                # if the last recorded event already targets this node.
-                last_event = run.events[-1] if run.events else None
-                if last_event is None:
-                    return
-                # If the last event was the one that brought us here (WORKFLOW_STARTED
-                # or a previous node's event), we stop and wait for user input.
-                expected = NODE_EVENT_MAP.get(current_node.type)
-                if last_event.event_type != expected or last_event.node_id != current_node.id:
-                    return
-
-            # Find the first matching transition.
-            next_node_id = self._resolve_transition(run, current_node)
-            run.current_node_id = next_node_id
+            if node.is_actionable:
+                return
 
         raise TransitionError("Maximum transition depth exceeded — possible cycle in workflow.")
 
-    def _resolve_transition(self, run: WorkflowRun, node: Node) -> str:
-        """Find the first transition from ``node`` whose condition is satisfied."""
-        outgoing = [t for t in run.definition.transitions if t.from_node == node.id]
-        if not outgoing:
-            raise TransitionError(f"No outgoing transitions from node '{node.id}'.")
-
-        for t in outgoing:
+    def _resolve_transition(self, run: WorkflowRun, node_id: str) -> str:
+        """Find the first transition from ``node_id`` whose condition is satisfied."""
+        definition = run.definition
+        next_node_id = definition._trivial_next.get(node_id)
+        if next_node_id is not None:
+            return next_node_id
+
+        router = definition._routers.get(node_id)
+        if router is None:
+            raise TransitionError(f"No outgoing transitions from node '{node_id}'.")
+
+        try:
+            next_node_id = router(run.context)
+        except Exception:
+            # Re-scan with the generic evaluator to report the failing transition.
+            return self._scan_transitions(run, node_id)
+        if next_node_id is None:
+            raise TransitionError(
+                f"No transition condition matched for node '{node_id}'. Context: {run.context}"
+            )
+        return next_node_id
+
+    def _scan_transitions(self, run: WorkflowRun, node_id: str) -> str:
+        """Generic (uncompiled) equivalent of the generated router for ``node_id``."""
+        definition = run.definition
+        context = run.context
+        targets = definition._targets[node_id]
+        for to_node, predicate in zip(targets, definition._predicates[node_id], strict=True):
+            if predicate is None:
+                return to_node
             try:
-                if t.can_fire(run.context):
-                    return t.to_node
+                if predicate(context):
+                    return to_node
             except Exception as exc:
                 raise ConditionEvaluationError(
-                    f"Error evaluating condition on transition "
-                    f"'{t.from_node}' -> '{t.to_node}': {exc}"
+                    f"Error evaluating condition on transition '{node_id}' -> '{to_node}': {exc}"
                 ) from exc
 
         raise TransitionError(
-            f"No transition condition matched for node '{node.id}'. Context: {run.context}"
+            f"No transition condition matched for node '{node_id}'. Context: {run.context}"
         )
@@ -2,13 +2,23 @@
 
 from __future__ import annotations
 
-import uuid
+import dataclasses
+import functools
+import hashlib
+import math
+import operator
+import sys
+from collections import ChainMap
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from enum import Enum
-from typing import TYPE_CHECKING, Any
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, ClassVar
+
+from workflow_engine.codegen import compile_routers
 
 if TYPE_CHECKING:
-    from datetime import datetime
+    from collections.abc import Callable, Iterable, Mapping, Sequence
 
 
 class NodeType(str, Enum):
@@ -46,48 +56,104 @@ NODE_EVENT_MAP: dict[NodeType, EventType] = {
 }
 
 
-@dataclass(frozen=True)
+def _is_in(actual: Any, value: Any) -> bool:
+    return actual in value
+
+
+def _is_not_in(actual: Any, value: Any) -> bool:
+    return actual not in value
+
+
+def _read_only(self: Any, *args: Any, **kwargs: Any) -> Any:
+    raise TypeError(f"'{type(self).__name__}' object is read-only")
+
+
+class _FrozenDict(dict[str, Any]):
+    """A dict that rejects mutation; still a ``dict`` for equality and JSON."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (type(self), (dict(self),))
+
+
+class _FrozenList(list[Any]):
+    """A list that rejects mutation; still a ``list`` for equality and JSON."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (type(self), (list(self),))
+
+
+def _freeze(value: Any) -> Any:
+    """Return a read-only deep copy of nested dicts and lists in ``value``."""
+    if isinstance(value, dict):
+        return _FrozenDict({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return _FrozenList(_freeze(v) for v in value)
+    return value
+
+
+def _unknown_operator(op: str, actual: Any, value: Any) -> bool:
+    raise ValueError(f"Unknown operator: {op}")
+
+
+# Maps condition operators to ``fn(actual, value)`` comparison callables.
+_OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": _is_in,
+    "not_in": _is_not_in,
+    "contains": operator.contains,
+}
+
+
+@dataclass(frozen=True, slots=True)
 class Condition:
     """A condition that must be met for a transition to fire.
 
     Evaluates ``context[field] operator value``.
     Supported operators: eq, neq, gt, gte, lt, lte, in, not_in, contains.
+
+    The comparison function is resolved once at construction time, so
+    ``evaluate`` does not re-dispatch on the operator string. An unknown
+    operator binds a function that raises ``ValueError`` when evaluated.
+    Dict and list values are stored as read-only copies, since parsed
+    definitions are cached and shared.
     """
 
     field: str
     operator: str
     value: Any
+    # ``dataclasses.field`` is spelled out because the ``field`` attribute shadows it here.
+    _fn: Callable[[Any, Any], Any] = dataclasses.field(init=False, repr=False, compare=False)
 
-    OPERATORS: frozenset[str] = frozenset(
-        {"eq", "neq", "gt", "gte", "lt", "lte", "in", "not_in", "contains"}
-    )
+    OPERATORS: ClassVar[frozenset[str]] = frozenset(_OPERATORS)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "value", _freeze(self.value))
+        fn = _OPERATORS.get(self.operator) or functools.partial(_unknown_operator, self.operator)
+        object.__setattr__(self, "_fn", fn)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Rebuild through the constructor so derived fields are recomputed.
+        return (type(self), (self.field, self.operator, self.value))
 
     def evaluate(self, context: dict[str, Any]) -> bool:
         """Evaluate this condition against a context dict."""
-        actual = context.get(self.field)
-        op = self.operator
-        if op == "eq":
-            return bool(actual == self.value)
-        if op == "neq":
-            return bool(actual != self.value)
-        if op == "gt":
-            return bool(actual > self.value)
-        if op == "gte":
-            return bool(actual >= self.value)
-        if op == "lt":
-            return bool(actual < self.value)
-        if op == "lte":
-            return bool(actual <= self.value)
-        if op == "in":
-            return bool(actual in self.value)
-        if op == "not_in":
-            return bool(actual not in self.value)
-        if op == "contains":
-            return bool(self.value in actual)  # type: ignore[operator]
-        raise ValueError(f"Unknown operator: {op}")
-
-
-@dataclass(frozen=True)
+        return bool(self._fn(context.get(self.field), self.value))
+
+
+@dataclass(frozen=True, slots=True)
 class Transition:
     """A transition between two nodes in a workflow."""
 
@@ -95,6 +161,9 @@ class Transition:
     to_node: str
     condition: Condition | None = None
 
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (type(self), (self.from_node, self.to_node, self.condition))
+
     def can_fire(self, context: dict[str, Any]) -> bool:
         """Return True if this transition's condition is met (or has no condition)."""
         if self.condition is None:
@@ -102,54 +171,252 @@ class Transition:
         return self.condition.evaluate(context)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Node:
-    """A node in a workflow definition."""
+    """A node in a workflow definition.
+
+    ``expected_event`` is the event type that advances this node (``None`` for
+    start and end nodes), resolved from ``NODE_EVENT_MAP`` at construction.
+    ``is_end`` and ``is_actionable`` (waits for an external event) are derived
+    from ``type`` at the same time, so the engine branches on plain booleans.
+    ``config`` is stored as a read-only copy (nested dicts and lists included).
+    """
 
     id: str
     type: NodeType
     label: str = ""
     config: dict[str, Any] = field(default_factory=dict)
+    expected_event: EventType | None = field(init=False, repr=False, compare=False)
+    is_end: bool = field(init=False, repr=False, compare=False)
+    is_actionable: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "config", _freeze(self.config))
+        expected = NODE_EVENT_MAP.get(self.type)
+        object.__setattr__(self, "expected_event", expected)
+        object.__setattr__(self, "is_end", self.type == NodeType.END)
+        object.__setattr__(self, "is_actionable", expected is not None)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Rebuild through the constructor so derived fields are recomputed.
+        return (type(self), (self.id, self.type, self.label, self.config))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WorkflowDefinition:
-    """An immutable workflow definition."""
+    """An immutable workflow definition.
+
+    ``nodes`` is stored as a read-only mapping and ``transitions`` as a tuple,
+    so a single definition can safely be shared between runs. ``outgoing``
+    maps each node id to its outgoing transitions in definition order.
+
+    The start and end nodes are looked up once at construction time, as is the
+    routing metadata for the engine: for each node, parallel tuples of target
+    ids and condition predicates (``None`` for unconditional transitions), the
+    fixed target of nodes whose first transition is unconditional, and a
+    generated routing function (see :mod:`workflow_engine.codegen`) that the
+    engine uses on its hot path.
+    """
 
     name: str
     version: str
-    nodes: dict[str, Node]
-    transitions: list[Transition]
+    nodes: Mapping[str, Node]
+    transitions: Sequence[Transition]
     description: str = ""
+    outgoing: Mapping[str, tuple[Transition, ...]] = field(init=False, repr=False, compare=False)
+    _routers: Mapping[str, Callable[[dict[str, Any]], str | None]] = field(
+        init=False, repr=False, compare=False
+    )
+    _targets: Mapping[str, tuple[str, ...]] = field(init=False, repr=False, compare=False)
+    _predicates: Mapping[str, tuple[Callable[[dict[str, Any]], bool] | None, ...]] = field(
+        init=False, repr=False, compare=False
+    )
+    _trivial_next: Mapping[str, str] = field(init=False, repr=False, compare=False)
+    _start_node: Node | None = field(init=False, repr=False, compare=False)
+    _end_nodes: tuple[Node, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "nodes", MappingProxyType(dict(self.nodes)))
+        object.__setattr__(self, "transitions", tuple(self.transitions))
+        object.__setattr__(
+            self,
+            "_start_node",
+            next((n for n in self.nodes.values() if n.type == NodeType.START), None),
+        )
+        object.__setattr__(
+            self, "_end_nodes", tuple(n for n in self.nodes.values() if n.type == NodeType.END)
+        )
+
+        # Group transitions by source node, preserving definition order.
+        outgoing: dict[str, list[Transition]] = {}
+        for t in self.transitions:
+            outgoing.setdefault(t.from_node, []).append(t)
+        object.__setattr__(
+            self,
+            "outgoing",
+            MappingProxyType({node_id: tuple(ts) for node_id, ts in outgoing.items()}),
+        )
+        object.__setattr__(
+            self,
+            "_targets",
+            MappingProxyType(
+                {node_id: tuple(t.to_node for t in ts) for node_id, ts in outgoing.items()}
+            ),
+        )
+        object.__setattr__(
+            self,
+            "_predicates",
+            MappingProxyType(
+                {
+                    node_id: tuple(t.condition.evaluate if t.condition else None for t in ts)
+                    for node_id, ts in outgoing.items()
+                }
+            ),
+        )
+        # Nodes whose first transition is unconditional always take it.
+        object.__setattr__(
+            self,
+            "_trivial_next",
+            MappingProxyType(
+                {
+                    node_id: ts[0].to_node
+                    for node_id, ts in outgoing.items()
+                    if ts[0].condition is None
+                }
+            ),
+        )
+        object.__setattr__(
+            self,
+            "_routers",
+            MappingProxyType(compile_routers(self.name, self.outgoing)),
+        )
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Pickle only the declared inputs; the read-only mappings are not
+        # picklable and the routing tables are rebuilt by __post_init__.
+        return (
+            type(self),
+            (self.name, self.version, dict(self.nodes), self.transitions, self.description),
+        )
 
     @property
     def start_node(self) -> Node:
         """Return the single start node."""
-        for node in self.nodes.values():
-            if node.type == NodeType.START:
-                return node
-        raise ValueError("No start node found")  # pragma: no cover – validated earlier
+        if self._start_node is None:  # pragma: no cover – validated earlier
+            raise ValueError("No start node found")
+        return self._start_node
 
     @property
-    def end_nodes(self) -> list[Node]:
-        """Return all end nodes."""
-        return [n for n in self.nodes.values() if n.type == NodeType.END]
+    def end_nodes(self) -> tuple[Node, ...]:
+        """Return all end nodes, in definition order."""
+        return self._end_nodes
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Event:
-    """An immutable event in the workflow event log."""
+    """An immutable event in the workflow event log.
+
+    ``timestamp`` is stored as integer nanoseconds since the Unix epoch (as
+    returned by ``time.time_ns()``); use :attr:`recorded_at` for a datetime.
+    ``idempotency_key`` is empty for events submitted without one.
+    """
 
     event_type: EventType
-    timestamp: datetime
+    timestamp: int
     payload: dict[str, Any] = field(default_factory=dict)
-    idempotency_key: str = field(default_factory=lambda: uuid.uuid4().hex)
+    idempotency_key: str = ""
     node_id: str = ""
 
+    def __post_init__(self) -> None:
+        # Share the interned node id string parsed from the definition.
+        object.__setattr__(self, "node_id", sys.intern(self.node_id))
+
+    @property
+    def recorded_at(self) -> datetime:
+        """Return the event timestamp as a timezone-aware UTC datetime."""
+        seconds, nanos = divmod(self.timestamp, 1_000_000_000)
+        return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=nanos // 1000)
+
+
+def _probe_seed(key: str) -> tuple[int, int]:
+    """Return the start and stride of a key's Bloom filter probes.
 
-@dataclass
+    Double hashing: probe i is (start + i * stride) mod num_bits. Both halves
+    come from one stable 64-bit digest so they agree across processes.
+    """
+    h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+    return h & 0xFFFF_FFFF, (h >> 32) | 1
+
+
+class IdempotencyFilter:
+    """A Bloom filter of idempotency keys, as a compact stand-in for a set.
+
+    Membership tests may return false positives (at roughly ``error_rate``
+    once ``capacity`` keys have been added) but never false negatives.
+    :meth:`WorkflowRun.has_seen_key` confirms positives against the event
+    log, so duplicate detection stays exact. Probes are derived from a
+    BLAKE2b digest rather than the per-process salted ``hash()``, so a
+    pickled filter stays valid in another process.
+
+    The filter does not grow. Past ``capacity`` keys the false-positive rate
+    climbs towards 1, and every keyed submit then ends in a scan of the whole
+    event log, making a run's key checks O(n²) overall; size ``capacity`` for
+    the longest expected run. The filter takes about 1.2 bytes
+    per key at the default 1% rate, against tens of bytes per entry for a set,
+    but its probes run in Python and each lookup is much slower. Enable it
+    with ``WorkflowEngine(key_filter_capacity=...)`` for runs whose key sets
+    would otherwise dominate memory.
+    """
+
+    __slots__ = ("_bits", "_num_bits", "_num_hashes")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._num_bits = num_bits
+        self._num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self._bits = bytearray((num_bits + 7) // 8)
+
+    def add(self, key: str) -> None:
+        """Add a key to the filter."""
+        pos, step = _probe_seed(key)
+        bits, num_bits = self._bits, self._num_bits
+        for _ in range(self._num_hashes):
+            bit = pos % num_bits
+            bits[bit >> 3] |= 1 << (bit & 7)
+            pos += step
+
+    def update(self, keys: Iterable[str]) -> None:
+        """Add every key in ``keys`` to the filter."""
+        add = self.add
+        for key in keys:
+            add(key)
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        pos, step = _probe_seed(key)
+        bits, num_bits = self._bits, self._num_bits
+        for _ in range(self._num_hashes):
+            bit = pos % num_bits
+            if not bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+            pos += step
+        return True
+
+
+@dataclass(slots=True)
 class WorkflowRun:
-    """Mutable state of a running workflow instance."""
+    """Mutable state of a running workflow instance.
+
+    Idempotency keys are tracked in a set alongside the event log so
+    duplicate detection stays O(1) regardless of log length. Runs created by
+    an engine with ``key_filter_capacity`` track them in an
+    :class:`IdempotencyFilter` instead, checking filter hits against the log.
+    """
 
     run_id: str
     definition: WorkflowDefinition
@@ -157,7 +424,7 @@ class WorkflowRun:
     current_node_id: str
     status: RunStatus = RunStatus.RUNNING
     events: list[Event] = field(default_factory=list)
-    _seen_keys: set[str] = field(default_factory=set, repr=False)
+    _seen_keys: set[str] | IdempotencyFilter = field(default_factory=set, repr=False)
 
     def record_event(self, event: Event) -> None:
         """Append an event and track its idempotency key."""
@@ -167,4 +434,25 @@ class WorkflowRun:
 
     def has_seen_key(self, key: str) -> bool:
         """Check whether an idempotency key has already been used."""
-        return key in self._seen_keys
+        seen = self._seen_keys
+        if key not in seen:
+            return False
+        if isinstance(seen, IdempotencyFilter):
+            # Filter hits may be false positives; the event log is definitive.
+            return any(event.idempotency_key == key for event in self.events)
+        return True
+
+    def context_at(self, index: int) -> ChainMap[str, Any]:
+        """Return the context as it was right after ``events[index]`` was applied.
+
+        The view is built lazily from the initial context and the event payloads
+        rather than copied; writes to it go to a fresh top-level dict and never
+        reach the event log.
+
+        Raises:
+            IndexError: If ``index`` is out of range for the event log.
+        """
+        last = range(len(self.events))[index]
+        initial = self.events[0].payload.get("context", {})
+        deltas = [self.events[i].payload for i in range(last, 0, -1)]
+        return ChainMap({}, *deltas, initial)
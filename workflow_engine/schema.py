@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
-from typing import Any
-
-import jsonschema
+import functools
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from workflow_engine.exceptions import (
     WorkflowDefinitionError,
@@ -18,6 +22,11 @@ from workflow_engine.models import (
     WorkflowDefinition,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import jsonschema
+
 CONDITION_SCHEMA: dict[str, Any] = {
     "type": "object",
     "properties": {
@@ -77,14 +86,58 @@ WORKFLOW_SCHEMA: dict[str, Any] = {
 }
 
 
+@functools.cache
+def _get_validator() -> jsonschema.Draft7Validator:
+    """Build the schema validator on first use and reuse it afterwards.
+
+    jsonschema is imported here rather than at module level so that importing
+    the package (e.g. only to run or replay workflows) does not pay for it.
+    """
+    import jsonschema
+
+    return jsonschema.Draft7Validator(WORKFLOW_SCHEMA)
+
+
+@functools.cache
+def _get_fast_validator() -> Callable[[Any], Any] | None:
+    """Return a fastjsonschema-compiled validator, or None if it is not installed."""
+    try:
+        import fastjsonschema
+    except ImportError:
+        return None
+    validate: Callable[[Any], Any] = fastjsonschema.compile(WORKFLOW_SCHEMA)
+    return validate
+
+
 def validate_schema(data: dict[str, Any]) -> None:
     """Validate raw JSON data against the workflow JSON schema.
 
+    When ``fastjsonschema`` is installed (the ``perf`` extra), data whose
+    ``nodes`` and ``transitions`` are lists is first checked with a compiled
+    validator; jsonschema only runs when that check fails, to produce the
+    full, path-annotated error report. The result does not depend on which
+    extras are installed.
+
     Raises:
         WorkflowValidationError: If the data does not conform to the schema.
     """
-    validator = jsonschema.Draft7Validator(WORKFLOW_SCHEMA)
-    errors = sorted(validator.iter_errors(data), key=lambda e: list(e.absolute_path))
+    fast_validate = _get_fast_validator()
+    # fastjsonschema also accepts tuples as JSON arrays; jsonschema does not, so
+    # only take the fast path when the result cannot differ.
+    if (
+        fast_validate is not None
+        and isinstance(data, dict)
+        and isinstance(data.get("nodes"), list)
+        and isinstance(data.get("transitions"), list)
+    ):
+        try:
+            fast_validate(data)
+        except ValueError:  # fastjsonschema.JsonSchemaException
+            pass
+        else:
+            return
+
+    errors = sorted(_get_validator().iter_errors(data), key=lambda e: list(e.absolute_path))
     if errors:
         messages = [f"  - {e.json_path}: {e.message}" for e in errors]
         raise WorkflowValidationError(
@@ -118,21 +171,19 @@ def _validate_structure(definition: WorkflowDefinition) -> None:
     if not end_nodes:
         errors.append("Workflow must have at least one end node.")
 
-    node_ids = set(definition.nodes.keys())
+    node_ids = definition.nodes.keys()
+    start_id = start_nodes[0].id if start_nodes else None
     for t in definition.transitions:
         if t.from_node not in node_ids:
             errors.append(f"Transition references unknown from_node '{t.from_node}'.")
         if t.to_node not in node_ids:
             errors.append(f"Transition references unknown to_node '{t.to_node}'.")
-
-    start_id = start_nodes[0].id if start_nodes else None
-    end_ids = {n.id for n in end_nodes}
-
-    for t in definition.transitions:
         if t.to_node == start_id:
             errors.append(f"Start node '{start_id}' must not have incoming transitions.")
-        if t.from_node in end_ids:
-            errors.append(f"End node '{t.from_node}' must not have outgoing transitions.")
+
+    for end in end_nodes:
+        for _ in definition.outgoing.get(end.id, ()):
+            errors.append(f"End node '{end.id}' must not have outgoing transitions.")
 
     if errors:
         raise WorkflowDefinitionError(
@@ -143,18 +194,73 @@ def _validate_structure(definition: WorkflowDefinition) -> None:
 def parse_workflow(data: dict[str, Any]) -> WorkflowDefinition:
     """Parse and validate a raw JSON dict into a WorkflowDefinition.
 
-    This is the primary entry point for loading workflows.
+    This is the primary entry point for loading workflows. Results are cached
+    by the canonical JSON form of ``data``, so parsing an identical definition
+    again returns the same (immutable) WorkflowDefinition instance without
+    re-running validation. Data that does not survive a JSON round trip
+    unchanged (tuples, non-string keys, ``NaN``) is parsed as given, uncached.
 
     Raises:
         WorkflowValidationError: If JSON schema validation fails.
         WorkflowDefinitionError: If structural validation fails.
     """
+    try:
+        canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        # Not JSON-serializable; let schema validation report the problem.
+        return _parse_workflow(data)
+    source, definition = _parse_canonical(canonical)
+    if source != data:
+        # The JSON form differs from the input (e.g. tuples became lists), so
+        # the cached definition would not be what ``data`` describes.
+        return _parse_workflow(data)
+    return definition
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_canonical(canonical: str) -> tuple[dict[str, Any], WorkflowDefinition]:
+    """Parse a canonical JSON string; cached so repeated definitions are shared.
+
+    Returns the decoded data alongside the definition built from it, so the
+    caller can check that its input round-trips to the same data. Building
+    from a fresh ``json.loads`` keeps cached instances from aliasing
+    caller-owned data.
+    """
+    source = json.loads(canonical)
+    return source, _parse_workflow(source)
+
+
+@functools.lru_cache(maxsize=1024, typed=True)
+def _shared_transition(
+    from_node: str,
+    to_node: str,
+    field: str | None = None,
+    operator: str | None = None,
+    value: Any = None,
+) -> Transition:
+    """Return a Transition shared by every definition that declares the same edge.
+
+    Transitions are immutable, so identical edges across parsed workflows can
+    reuse one instance (and its bound condition function). The condition is
+    passed as separate arguments so ``typed=True`` keeps e.g. ``1``, ``1.0``
+    and ``True`` values distinct. Raises TypeError for unhashable values.
+    """
+    condition = None
+    if field is not None and operator is not None:
+        condition = Condition(field=field, operator=operator, value=value)
+    return Transition(from_node=from_node, to_node=to_node, condition=condition)
+
+
+def _parse_workflow(data: dict[str, Any]) -> WorkflowDefinition:
+    """Uncached implementation of :func:`parse_workflow`."""
     validate_schema(data)
 
+    # Node ids are interned so the engine's id comparisons (event node ids,
+    # transition endpoints, dict keys) usually short-circuit on identity.
     nodes: dict[str, Node] = {}
     for node_data in data["nodes"]:
         node = Node(
-            id=node_data["id"],
+            id=sys.intern(node_data["id"]),
             type=NodeType(node_data["type"]),
             label=node_data.get("label", ""),
             config=node_data.get("config", {}),
@@ -165,17 +271,20 @@ def parse_workflow(data: dict[str, Any]) -> WorkflowDefinition:
 
     transitions: list[Transition] = []
     for t_data in data["transitions"]:
-        condition = None
-        if "condition" in t_data:
-            c = t_data["condition"]
-            condition = Condition(field=c["field"], operator=c["operator"], value=c["value"])
-        transitions.append(
-            Transition(
-                from_node=t_data["from_node"],
-                to_node=t_data["to_node"],
-                condition=condition,
+        from_node = sys.intern(t_data["from_node"])
+        to_node = sys.intern(t_data["to_node"])
+        c = t_data.get("condition")
+        if c is None:
+            transitions.append(_shared_transition(from_node, to_node))
+            continue
+        try:
+            transition = _shared_transition(
+                from_node, to_node, c["field"], c["operator"], c["value"]
             )
-        )
+        except TypeError:  # unhashable condition value (list/dict); build a private one
+            condition = Condition(field=c["field"], operator=c["operator"], value=c["value"])
+            transition = Transition(from_node=from_node, to_node=to_node, condition=condition)
+        transitions.append(transition)
 
     definition = WorkflowDefinition(
         name=data["name"],
@@ -187,3 +296,56 @@ def parse_workflow(data: dict[str, Any]) -> WorkflowDefinition:
 
     _validate_structure(definition)
     return definition
+
+
+# Bump when a pickled definition from an earlier release can no longer be
+# rebuilt by the current model constructors.
+_ARTIFACT_FORMAT = 1
+
+
+def load_definition(path: str | os.PathLike[str]) -> WorkflowDefinition:
+    """Load a workflow definition from a JSON file, reusing a compiled artifact.
+
+    The parsed definition is pickled to ``<path>.compiled`` next to the JSON
+    file. Later calls load that artifact directly, skipping JSON decoding and
+    validation, as long as it is newer than the JSON file. A missing, stale or
+    unreadable artifact falls back to :func:`parse_workflow` and is rewritten
+    when the directory is writable.
+
+    The artifact is a pickle tagged with ``_ARTIFACT_FORMAT``; artifacts with
+    another tag (e.g. written by an older release) are re-parsed. Models
+    pickle their constructor arguments, so derived fields are recomputed on
+    load. Only use this for files in a directory you trust as much as the
+    JSON itself.
+
+    Raises:
+        WorkflowValidationError: If JSON schema validation fails.
+        WorkflowDefinitionError: If structural validation fails.
+    """
+    source = Path(path)
+    compiled = source.with_name(source.name + ".compiled")
+
+    try:
+        if compiled.stat().st_mtime_ns > source.stat().st_mtime_ns:
+            with compiled.open("rb") as f:
+                cached = pickle.load(f)
+            if (
+                isinstance(cached, tuple)
+                and len(cached) == 2
+                and cached[0] == _ARTIFACT_FORMAT
+                and isinstance(cached[1], WorkflowDefinition)
+            ):
+                return cached[1]
+    except Exception:  # any unusable artifact just means a re-parse
+        pass
+
+    definition = parse_workflow(json.loads(source.read_bytes()))
+
+    tmp = compiled.with_name(f"{compiled.name}.{os.getpid()}.tmp")
+    try:
+        artifact = (_ARTIFACT_FORMAT, definition)
+        tmp.write_bytes(pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, compiled)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+    return definition